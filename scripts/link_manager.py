@@ -5,13 +5,28 @@ Link Manager - CRUD operations for OpenLinks
 Handles creating, reading, updating, and deleting link JSON files.
 """
 
+import functools
 import json
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, List
-from urllib.parse import urlparse, urlencode
+from typing import Optional, Dict, List, Set, Tuple
+from urllib.parse import urlencode
+
+try:
+    import orjson
+    
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+    
+    _loads = json.loads
 
 
 # Constants
@@ -21,45 +36,119 @@ ARCHIVED_LINKS_DIR = PROJECT_ROOT / "data" / "links" / "archived"
 QR_CODES_DIR = PROJECT_ROOT / "data" / "links" / "qr-codes"
 CONFIG_FILE = PROJECT_ROOT / "data" / "config.json"
 
+# Number of active links above which list_links() parses files in a thread pool
+PARALLEL_LOAD_THRESHOLD = 32
+
+# UTC timestamp format for stored link metadata
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+# Precompiled patterns
+_SLUG_RE = re.compile(r'^[a-zA-Z0-9_-]+$')
+_URL_RE = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*://[^/\s?#]+')
+_EXPIRE_RE = re.compile(r'(?:(\d+)\s*)?(day|week|month)s?')
+_ISO_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# Days per relative expiration unit, and the count used when none is given
+# (a bare "day" keeps its historical "next week" meaning)
+_EXPIRE_UNIT_DAYS = {'day': 1, 'week': 7, 'month': 30}
+_EXPIRE_DEFAULT_COUNT = {'day': 7, 'week': 1, 'month': 1}
+
+
+# Slugs of active links, populated lazily by slug_exists()
+_ACTIVE_SLUGS: Optional[Set[str]] = None
+
+# Parsed config.json, keyed by the mtime it was read at
+_config_cache: Optional[Tuple[float, Dict]] = None
+
 
 def load_config() -> Dict:
-    """Load configuration from config.json"""
-    if not CONFIG_FILE.exists():
+    """Load configuration from config.json (cached until the file changes)"""
+    global _config_cache
+    
+    try:
+        mtime = CONFIG_FILE.stat().st_mtime
+    except FileNotFoundError:
         return {
             "base_url": "https://go.openhands.dev",
             "primary_domain": "https://openhands.dev"
         }
     
-    with open(CONFIG_FILE, 'r') as f:
-        return json.load(f)
+    if _config_cache is None or _config_cache[0] != mtime:
+        with open(CONFIG_FILE, 'r') as f:
+            _config_cache = (mtime, json.load(f))
+    
+    return _config_cache[1]
 
 
-def validate_url(url: str) -> bool:
-    """Validate URL format"""
+def invalidate_config() -> None:
+    """Drop the cached config so the next load_config() re-reads the file"""
+    global _config_cache
+    _config_cache = None
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write data to path via a temp file + rename so readers never see a partial file"""
+    tmp_path = path.with_suffix(f"{path.suffix}.tmp.{os.getpid()}")
     try:
-        result = urlparse(url)
-        return all([result.scheme, result.netloc])
-    except:
-        return False
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def validate_url(url: str) -> bool:
+    """Validate URL format (scheme and host present)"""
+    return isinstance(url, str) and bool(_URL_RE.match(url))
 
 
 def validate_slug(slug: str) -> bool:
     """Validate slug format (alphanumeric, hyphens, underscores only)"""
-    return bool(re.match(r'^[a-zA-Z0-9_-]+$', slug))
+    return bool(_SLUG_RE.match(slug))
+
+
+def _load_active_slugs() -> Set[str]:
+    """Scan the active links directory for slugs"""
+    return {p.stem for p in ACTIVE_LINKS_DIR.iterdir() if p.suffix == '.json'}
+
+
+def invalidate_slug_cache() -> None:
+    """Drop the cached slug set (e.g. after files change outside this module)"""
+    global _ACTIVE_SLUGS
+    _ACTIVE_SLUGS = None
 
 
 def slug_exists(slug: str) -> bool:
     """Check if a slug already exists"""
-    link_file = ACTIVE_LINKS_DIR / f"{slug}.json"
-    return link_file.exists()
+    global _ACTIVE_SLUGS
+    if _ACTIVE_SLUGS is None:
+        _ACTIVE_SLUGS = _load_active_slugs()
+    return slug in _ACTIVE_SLUGS
+
 
+def _now_iso() -> str:
+    """Current UTC time formatted for link metadata"""
+    return datetime.utcnow().strftime(TIMESTAMP_FORMAT)
 
-def generate_link_id(slug: str) -> str:
+
+def generate_link_id(slug: str, now: Optional[datetime] = None) -> str:
     """Generate unique ID for a link"""
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    timestamp = (now or datetime.utcnow()).strftime("%Y%m%d_%H%M%S")
     return f"{slug}_{timestamp}"
 
 
+@functools.lru_cache(maxsize=1024)
+def _parse_expiration_offset(text: str) -> Optional[timedelta]:
+    """Offset from now for relative expiration text ("3 days", "next week")"""
+    match = _EXPIRE_RE.search(text)
+    if not match:
+        return None
+    
+    count, unit = match.groups()
+    count = int(count) if count else _EXPIRE_DEFAULT_COUNT[unit]
+    return timedelta(days=count * _EXPIRE_UNIT_DAYS[unit])
+
+
 def parse_expiration(expiration_text: Optional[str]) -> Optional[str]:
     """
     Parse natural language expiration text to ISO timestamp
@@ -75,44 +164,21 @@ def parse_expiration(expiration_text: Optional[str]) -> Optional[str]:
         return None
     
     text = expiration_text.lower().strip()
-    now = datetime.utcnow()
-    
-    # Handle relative times
-    if "day" in text:
-        days_match = re.search(r'(\d+)\s*days?', text)
-        if days_match:
-            days = int(days_match.group(1))
-        else:
-            days = 7  # default "next week"
-        expire_date = now + timedelta(days=days)
-        return expire_date.isoformat() + "Z"
-    
-    if "week" in text:
-        weeks_match = re.search(r'(\d+)\s*weeks?', text)
-        if weeks_match:
-            weeks = int(weeks_match.group(1))
-        else:
-            weeks = 1
-        expire_date = now + timedelta(weeks=weeks)
-        return expire_date.isoformat() + "Z"
-    
-    if "month" in text:
-        months_match = re.search(r'(\d+)\s*months?', text)
-        if months_match:
-            months = int(months_match.group(1))
-        else:
-            months = 1
-        expire_date = now + timedelta(days=months * 30)
-        return expire_date.isoformat() + "Z"
     
     # Handle ISO format
-    if re.match(r'\d{4}-\d{2}-\d{2}', text):
+    if _ISO_RE.match(text):
         try:
-            expire_date = datetime.fromisoformat(text.replace('Z', ''))
-            return expire_date.isoformat() + "Z"
+            expire_date = datetime.fromisoformat(text.replace('z', ''))
+            return expire_date.strftime(TIMESTAMP_FORMAT)
         except:
             pass
     
+    # Handle relative times
+    offset = _parse_expiration_offset(text)
+    if offset is not None:
+        expire_date = datetime.utcnow() + offset
+        return expire_date.strftime(TIMESTAMP_FORMAT)
+    
     return None
 
 
@@ -163,11 +229,14 @@ def create_link(
         expires_at = parse_expiration(expires_at)
     
     # Build link data
+    now = datetime.utcnow()
+    now_iso = now.strftime(TIMESTAMP_FORMAT)
+    
     link_data = {
-        "id": generate_link_id(slug),
+        "id": generate_link_id(slug, now),
         "slug": slug,
         "destination": destination,
-        "created_at": datetime.utcnow().isoformat() + "Z",
+        "created_at": now_iso,
         "created_by": created_by,
         "expires_at": expires_at,
         "redirect_after_expiry": redirect_after_expiry,
@@ -179,14 +248,16 @@ def create_link(
         },
         "metadata": {
             "description": description or f"Link to {destination}",
-            "last_modified": datetime.utcnow().isoformat() + "Z"
+            "last_modified": now_iso
         }
     }
     
     # Save to file
     link_file = ACTIVE_LINKS_DIR / f"{slug}.json"
-    with open(link_file, 'w') as f:
-        json.dump(link_data, f, indent=2)
+    _atomic_write(link_file, _dumps(link_data))
+    
+    if _ACTIVE_SLUGS is not None:
+        _ACTIVE_SLUGS.add(slug)
     
     return link_data
 
@@ -198,8 +269,7 @@ def read_link(slug: str) -> Optional[Dict]:
     if not link_file.exists():
         return None
     
-    with open(link_file, 'r') as f:
-        return json.load(f)
+    return _loads(link_file.read_bytes())
 
 
 def update_link(slug: str, updates: Dict) -> Dict:
@@ -235,12 +305,11 @@ def update_link(slug: str, updates: Dict) -> Dict:
     
     # Apply updates
     link_data.update(updates)
-    link_data['metadata']['last_modified'] = datetime.utcnow().isoformat() + "Z"
+    link_data['metadata']['last_modified'] = _now_iso()
     
     # Save
     link_file = ACTIVE_LINKS_DIR / f"{slug}.json"
-    with open(link_file, 'w') as f:
-        json.dump(link_data, f, indent=2)
+    _atomic_write(link_file, _dumps(link_data))
     
     return link_data
 
@@ -258,25 +327,33 @@ def delete_link(slug: str, archive: bool = True) -> bool:
     """
     link_file = ACTIVE_LINKS_DIR / f"{slug}.json"
     
-    if not link_file.exists():
+    try:
+        if archive:
+            # Move to archived
+            os.replace(link_file, ARCHIVED_LINKS_DIR / f"{slug}.json")
+        else:
+            # Permanently delete
+            os.unlink(link_file)
+    except FileNotFoundError:
         return False
     
-    if archive:
-        # Move to archived
-        archived_file = ARCHIVED_LINKS_DIR / f"{slug}.json"
-        link_file.rename(archived_file)
-    else:
-        # Permanently delete
-        link_file.unlink()
+    if _ACTIVE_SLUGS is not None:
+        _ACTIVE_SLUGS.discard(slug)
     
     # Also delete QR code if exists
-    qr_file = QR_CODES_DIR / f"{slug}.png"
-    if qr_file.exists():
-        qr_file.unlink()
+    try:
+        os.unlink(QR_CODES_DIR / f"{slug}.png")
+    except FileNotFoundError:
+        pass
     
     return True
 
 
+def _load_link_file(path: str) -> Dict:
+    """Parse a link JSON file"""
+    return _loads(Path(path).read_bytes())
+
+
 def list_links(tags: Optional[List[str]] = None) -> List[Dict]:
     """
     List all active links, optionally filtered by tags
@@ -288,16 +365,23 @@ def list_links(tags: Optional[List[str]] = None) -> List[Dict]:
         List of link data dictionaries
     """
     links = []
+    tag_set = set(tags or ())
     
-    for link_file in ACTIVE_LINKS_DIR.glob("*.json"):
-        with open(link_file, 'r') as f:
-            link_data = json.load(f)
-        
+    with os.scandir(ACTIVE_LINKS_DIR) as it:
+        paths = [entry.path for entry in it if entry.name.endswith('.json')]
+    
+    # Overlap file reads across threads once the directory is large enough
+    # to pay for the pool
+    if len(paths) > PARALLEL_LOAD_THRESHOLD:
+        with ThreadPoolExecutor(max_workers=min(16, len(paths))) as executor:
+            all_links = list(executor.map(_load_link_file, paths))
+    else:
+        all_links = [_load_link_file(path) for path in paths]
+    
+    for link_data in all_links:
         # Filter by tags if specified
-        if tags:
-            link_tags = link_data.get('tags', [])
-            if not any(tag in link_tags for tag in tags):
-                continue
+        if tag_set and tag_set.isdisjoint(link_data.get('tags', ())):
+            continue
         
         links.append(link_data)
     
@@ -315,16 +399,64 @@ def bulk_delete_by_tag(tag: str, archive: bool = True) -> int:
     Returns:
         Number of links deleted
     """
-    links = list_links(tags=[tag])
     deleted_count = 0
     
-    for link in links:
-        if delete_link(link['slug'], archive=archive):
-            deleted_count += 1
+    with os.scandir(ACTIVE_LINKS_DIR) as it:
+        entries = [entry for entry in it if entry.name.endswith('.json')]
+    
+    # Single pass: match and move/remove each file as it is read
+    for entry in entries:
+        link_data = _load_link_file(entry.path)
+        
+        if tag not in link_data.get('tags', ()):
+            continue
+        
+        if archive:
+            os.replace(entry.path, ARCHIVED_LINKS_DIR / entry.name)
+        else:
+            os.unlink(entry.path)
+        
+        slug = entry.name[:-len('.json')]
+        if _ACTIVE_SLUGS is not None:
+            _ACTIVE_SLUGS.discard(slug)
+        
+        try:
+            os.unlink(QR_CODES_DIR / f"{slug}.png")
+        except FileNotFoundError:
+            pass
+        
+        deleted_count += 1
     
     return deleted_count
 
 
+def resolve_base_url() -> str:
+    """Base URL for short links, without a trailing slash"""
+    config = load_config()
+    base_url = config.get('base_url', 'https://go.openhands.dev')
+    
+    # Remove trailing slash
+    return base_url.rstrip('/')
+
+
+def format_link_url(link_data: Dict, base_url: Optional[str] = None) -> str:
+    """
+    Format the short URL for a link
+    
+    Args:
+        link_data: Link data dictionary (only 'slug' is used)
+        base_url: Pre-resolved base URL; resolved from config if omitted.
+            Pass it in when formatting many links in a loop.
+    
+    Returns:
+        Full URL (e.g., "https://go.openhands.dev/luma")
+    """
+    if base_url is None:
+        base_url = resolve_base_url()
+    
+    return f"{base_url}/{link_data['slug']}"
+
+
 def get_full_url(slug: str, include_utm: bool = True) -> str:
     """
     Get the full shortened URL for a slug
@@ -336,13 +468,7 @@ def get_full_url(slug: str, include_utm: bool = True) -> str:
     Returns:
         Full URL (e.g., "https://go.openhands.dev/luma")
     """
-    config = load_config()
-    base_url = config.get('base_url', 'https://go.openhands.dev')
-    
-    # Remove trailing slash
-    base_url = base_url.rstrip('/')
-    
-    return f"{base_url}/{slug}"
+    return format_link_url({"slug": slug})
 
 
 if __name__ == "__main__":
@@ -388,9 +514,10 @@ if __name__ == "__main__":
     
     elif command == "list":
         links = list_links()
+        base_url = resolve_base_url()
         print(f"Found {len(links)} links:")
         for link in links:
-            print(f"  - {get_full_url(link['slug'])} → {link['destination']}")
+            print(f"  - {format_link_url(link, base_url)} → {link['destination']}")
     
     elif command == "delete":
         if len(sys.argv) < 3:
@@ -15,24 +15,84 @@ Environment Variables:
     ISSUE_TITLE: Issue title
     ISSUE_BODY: Issue body text
     GITHUB_REPOSITORY: Repository in format owner/repo
+    OPENLINKS_PROMPT_CACHE: Optional path for the link-operation prompt cache
 """
 
 import json
 import os
 import re
+import shlex
 import subprocess
 import sys
 from pathlib import Path
+from typing import List, Optional
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 # Add parent directory to path for imports
+# (link_manager and openlinks_prompts are imported lazily where used)
 sys.path.insert(0, str(Path(__file__).parent))
 
-import link_manager
-from openlinks_prompts import (
-    CLASSIFICATION_PROMPT,
-    LINK_OPERATION_PROMPT,
-    FEATURE_IMPLEMENTATION_PROMPT
-)
+
+# Strong LINK indicators
+_LINK_RES = tuple(re.compile(p) for p in [
+    r'https?://',  # Contains URLs
+    r'shorten',
+    r'create\s+link',
+    r'delete\s+link',
+    r'update\s+link',
+    r'→',  # Arrow symbol often used in link requests
+    r'to\s+/',  # "to /slug"
+    r'utm',
+])
+
+# Strong FEATURE indicators
+_FEATURE_RES = tuple(re.compile(p) for p in [
+    r'add\s+(support|ability|feature|capability)',
+    r'implement',
+    r'create\s+(a|an)\s+(feature|system|dashboard|page)',
+    r'enable',
+    r'build',
+    r'develop',
+])
+
+# Fallback parsing of link operations when the LLM is unavailable
+_JSON_BLOCK_RE = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL)
+_URL_IN_BODY_RE = re.compile(r'https?://\S+')
+_SLUG_IN_BODY_RE = re.compile(r'/(\w+)')
+_OP_RE = re.compile(r'delete|update|list', re.IGNORECASE)
+_OP_PRIORITY = ('delete', 'update', 'list')
+
+
+def _heuristic_classification(text: str) -> Optional[str]:
+    """
+    Score LINK/FEATURE indicators in text
+    
+    FEATURE patterns stop being searched once they outnumber the LINK
+    matches: FEATURE has won by then, whatever the rest would add.
+    
+    Returns:
+        "LINK", "FEATURE", or None if there is no clear winner
+    """
+    link_score = sum(1 for pattern in _LINK_RES if pattern.search(text))
+    
+    feature_score = 0
+    for pattern in _FEATURE_RES:
+        if pattern.search(text):
+            feature_score += 1
+            if feature_score > link_score:
+                return "FEATURE"
+    
+    if link_score > feature_score + 1:
+        return "LINK"
+    elif feature_score > link_score:
+        return "FEATURE"
+    
+    return None
 
 
 def get_env_or_exit(var_name: str) -> str:
@@ -44,20 +104,32 @@ def get_env_or_exit(var_name: str) -> str:
     return value
 
 
-def run_command(cmd: str, check=True) -> subprocess.CompletedProcess:
-    """Run shell command and return result"""
-    print(f"Running: {cmd}")
+def run_command(
+    cmd: List[str],
+    check=True,
+    input: Optional[str] = None,
+    capture: bool = True
+) -> subprocess.CompletedProcess:
+    """
+    Run a command (argv list, no shell) and return result
+    
+    With capture=False the command writes straight to our stdout/stderr
+    and result.stdout/result.stderr are None.
+    """
+    cmd_str = shlex.join(cmd)
+    print(f"Running: {cmd_str}", flush=True)
     result = subprocess.run(
         cmd,
-        shell=True,
-        capture_output=True,
-        text=True
+        capture_output=capture,
+        text=True,
+        input=input
     )
     
     if check and result.returncode != 0:
-        print(f"❌ Command failed: {cmd}")
-        print(f"stdout: {result.stdout}")
-        print(f"stderr: {result.stderr}")
+        print(f"❌ Command failed: {cmd_str}")
+        if capture:
+            print(f"stdout: {result.stdout}")
+            print(f"stderr: {result.stderr}")
         sys.exit(1)
     
     return result
@@ -65,8 +137,16 @@ def run_command(cmd: str, check=True) -> subprocess.CompletedProcess:
 
 def setup_git():
     """Configure git for commits"""
-    run_command('git config user.name "OpenLinks Agent"')
-    run_command('git config user.email "openhands@all-hands.dev"')
+    run_command(['git', 'config', 'user.name', 'OpenLinks Agent'], capture=False)
+    run_command(['git', 'config', 'user.email', 'openhands@all-hands.dev'], capture=False)
+
+
+def git_commit_and_push(paths: List[str], message: str):
+    """Stage the given paths and push them as a single commit"""
+    setup_git()
+    run_command(['git', 'add', '--', *paths], capture=False)
+    run_command(['git', 'commit', '-m', message], capture=False)
+    run_command(['git', 'push', 'origin', 'main'], capture=False)
 
 
 def react_to_issue(issue_number: str, reaction: str = "+1"):
@@ -77,7 +157,7 @@ def react_to_issue(issue_number: str, reaction: str = "+1"):
         print("⚠️  GITHUB_REPOSITORY not set, skipping reaction")
         return
     
-    cmd = f'gh api repos/{repo}/issues/{issue_number}/reactions -f content={reaction}'
+    cmd = ['gh', 'api', f'repos/{repo}/issues/{issue_number}/reactions', '-f', f'content={reaction}']
     result = run_command(cmd, check=False)
     
     if result.returncode != 0:
@@ -94,11 +174,9 @@ def comment_on_issue(issue_number: str, comment: str):
         print("⚠️  GITHUB_REPOSITORY not set, skipping comment")
         return
     
-    # Escape quotes in comment
-    comment_escaped = comment.replace('"', '\\"').replace('\n', '\\n')
-    
-    cmd = f'gh issue comment {issue_number} --body "{comment_escaped}" --repo {repo}'
-    result = run_command(cmd, check=False)
+    # Pass the body on stdin so it needs no quoting
+    cmd = ['gh', 'issue', 'comment', issue_number, '--body-file', '-', '--repo', repo]
+    result = run_command(cmd, check=False, input=comment)
     
     if result.returncode != 0:
         print(f"⚠️  Failed to comment on issue: {result.stderr}")
@@ -114,7 +192,7 @@ def close_issue(issue_number: str, reason: str = "completed"):
         print("⚠️  GITHUB_REPOSITORY not set, skipping close")
         return
     
-    cmd = f'gh issue close {issue_number} --reason {reason} --repo {repo}'
+    cmd = ['gh', 'issue', 'close', issue_number, '--reason', reason, '--repo', repo]
     result = run_command(cmd, check=False)
     
     if result.returncode != 0:
@@ -133,43 +211,22 @@ def classify_request(issue_title: str, issue_body: str) -> str:
     # Quick heuristics first
     combined_text = (issue_title + " " + issue_body).lower()
     
-    # Strong LINK indicators
-    link_patterns = [
-        r'https?://',  # Contains URLs
-        r'shorten',
-        r'create\s+link',
-        r'delete\s+link',
-        r'update\s+link',
-        r'→',  # Arrow symbol often used in link requests
-        r'to\s+/',  # "to /slug"
-        r'utm',
-    ]
-    
-    link_score = sum(1 for pattern in link_patterns if re.search(pattern, combined_text))
-    
-    # Strong FEATURE indicators
-    feature_patterns = [
-        r'add\s+(support|ability|feature|capability)',
-        r'implement',
-        r'create\s+(a|an)\s+(feature|system|dashboard|page)',
-        r'enable',
-        r'build',
-        r'develop',
-    ]
-    
-    feature_score = sum(1 for pattern in feature_patterns if re.search(pattern, combined_text))
-    
     # If clear winner, return it
-    if link_score > feature_score + 1:
-        return "LINK"
-    elif feature_score > link_score:
-        return "FEATURE"
+    classification = _heuristic_classification(combined_text)
+    if classification:
+        return classification
     
     # Otherwise, use LLM for classification
     print("🤔 Using LLM to classify request...")
     
     try:
         from openai import OpenAI
+        from openlinks_prompts import (
+            CLASSIFICATION_STATIC,
+            as_cached_messages,
+            classification_logit_bias,
+            classification_prompt
+        )
         
         api_key = os.getenv("LLM_API_KEY")
         model = os.getenv("LLM_MODEL", "claude-sonnet-4-5-20250929")
@@ -183,20 +240,29 @@ def classify_request(issue_title: str, issue_body: str) -> str:
         
         client = OpenAI(**client_kwargs)
         
-        prompt = CLASSIFICATION_PROMPT.format(
-            issue_title=issue_title,
-            issue_body=issue_body
+        messages = as_cached_messages(
+            CLASSIFICATION_STATIC,
+            classification_prompt(issue_title=issue_title, issue_body=issue_body)
         )
         
+        # The answer is one of two words, decided by its first letter, so a
+        # couple of tokens is enough
+        create_kwargs = {}
+        logit_bias = classification_logit_bias(model)
+        if logit_bias:
+            create_kwargs["logit_bias"] = logit_bias
+        
         response = client.chat.completions.create(
             model=model,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=10
+            messages=messages,
+            max_tokens=2,
+            temperature=0,
+            **create_kwargs
         )
         
-        classification = response.choices[0].message.content.strip().upper()
+        classification = response.choices[0].message.content.strip(" \n*\"'`").upper()
         
-        if "FEATURE" in classification:
+        if classification.startswith("F"):
             return "FEATURE"
         else:
             return "LINK"
@@ -214,8 +280,30 @@ def parse_link_operation(request_text: str) -> dict:
     Returns:
         Dictionary with operation details
     """
+    import openlinks_prompt_cache
+    from openlinks_fastparse import fastparse
+    
+    # Common request shapes are parsed by rules, no LLM needed
+    parsed = fastparse(request_text)
+    if parsed:
+        print("⚡ Parsed with fast-path rules")
+        return parsed
+    
+    # Requests shaped like one we've already parsed skip the LLM
+    cached = openlinks_prompt_cache.lookup(request_text)
+    if cached:
+        print("⚡ Parsed from prompt cache")
+        cached["operation"] = sys.intern(cached.get("operation") or "create")
+        return cached
+    
     try:
         from openai import OpenAI
+        from openlinks_prompts import (
+            LINK_OPERATION_RESPONSE_FORMAT,
+            LINK_OPERATION_STATIC,
+            as_cached_messages,
+            link_operation_prompt
+        )
         
         api_key = os.getenv("LLM_API_KEY")
         model = os.getenv("LLM_MODEL", "claude-sonnet-4-5-20250929")
@@ -228,48 +316,51 @@ def parse_link_operation(request_text: str) -> dict:
         
         client = OpenAI(**client_kwargs)
         
-        prompt = LINK_OPERATION_PROMPT.format(request_text=request_text)
+        messages = as_cached_messages(
+            LINK_OPERATION_STATIC,
+            link_operation_prompt(request_text=request_text)
+        )
         
         response = client.chat.completions.create(
             model=model,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=500
+            messages=messages,
+            max_tokens=500,
+            response_format=LINK_OPERATION_RESPONSE_FORMAT
         )
         
         response_text = response.choices[0].message.content.strip()
         
-        # Extract JSON from response (might be wrapped in markdown)
-        json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+        # Extract JSON from response (providers without schema support
+        # may still wrap it in markdown)
+        json_match = _JSON_BLOCK_RE.search(response_text)
         if json_match:
             response_text = json_match.group(1)
         
-        parsed = json.loads(response_text)
-        return parsed
+        parsed = _loads(response_text)
+        parsed["operation"] = sys.intern(parsed.get("operation") or "create")
+        
+        # The schema returns every UTM key; keep only the ones that were set,
+        # and None when there are none so updates leave existing UTMs alone
+        utm_params = parsed.get("utm_params") or {}
+        parsed["utm_params"] = {k: v for k, v in utm_params.items() if v} or None
     
     except Exception as e:
         print(f"⚠️  Error parsing with LLM: {e}")
         print("Falling back to simple parsing...")
         
         # Simple fallback parsing
-        text = request_text.lower()
         
         # Extract URL
-        url_match = re.search(r'(https?://[^\s]+)', request_text)
-        destination = url_match.group(1) if url_match else None
+        url_match = _URL_IN_BODY_RE.search(request_text)
+        destination = url_match.group(0) if url_match else None
         
         # Extract slug
-        slug_match = re.search(r'/(\w+)', request_text)
+        slug_match = _SLUG_IN_BODY_RE.search(request_text)
         slug = slug_match.group(1) if slug_match else None
         
-        # Detect operation
-        if 'delete' in text:
-            operation = 'delete'
-        elif 'update' in text:
-            operation = 'update'
-        elif 'list' in text:
-            operation = 'list'
-        else:
-            operation = 'create'
+        # Detect operation (delete > update > list > create)
+        mentioned = {word.lower() for word in _OP_RE.findall(request_text)}
+        operation = next((op for op in _OP_PRIORITY if op in mentioned), 'create')
         
         return {
             "operation": operation,
@@ -281,6 +372,10 @@ def parse_link_operation(request_text: str) -> dict:
             "tags": [],
             "description": None
         }
+    
+    openlinks_prompt_cache.store(request_text, parsed)
+    
+    return parsed
 
 
 def handle_link_operation(operation_data: dict, issue_number: str) -> str:
@@ -294,8 +389,14 @@ def handle_link_operation(operation_data: dict, issue_number: str) -> str:
     Returns:
         Success message to post as comment
     """
+    import link_manager
+    
     operation = operation_data.get("operation", "create")
     
+    # Files touched by the operation, committed together at the end
+    changed_paths: List[str] = []
+    commit_message = ""
+    
     try:
         if operation == "create":
             slug = operation_data.get("slug")
@@ -305,7 +406,7 @@ def handle_link_operation(operation_data: dict, issue_number: str) -> str:
                 return "❌ Error: Missing slug or destination URL for link creation"
             
             # Add issue number as tag
-            tags = operation_data.get("tags", [])
+            tags = operation_data.get("tags") or []
             tags.append(f"issue-{issue_number}")
             
             link_data = link_manager.create_link(
@@ -319,11 +420,8 @@ def handle_link_operation(operation_data: dict, issue_number: str) -> str:
                 created_by="openlinks-agent"
             )
             
-            # Commit and push
-            setup_git()
-            run_command(f'git add data/links/active/{slug}.json')
-            run_command(f'git commit -m "Add link: /{slug} → {destination} (issue #{issue_number})"')
-            run_command('git push origin main')
+            changed_paths.append(f'data/links/active/{slug}.json')
+            commit_message = f"Add link: /{slug} → {destination} (issue #{issue_number})"
             
             full_url = link_manager.get_full_url(slug)
             
@@ -340,25 +438,24 @@ def handle_link_operation(operation_data: dict, issue_number: str) -> str:
                     message += f"**After expiry redirects to:** {operation_data['redirect_after_expiry']}\n"
             
             message += f"\n🚀 Your link is live! Changes will deploy to Vercel automatically.\n"
-            
-            return message
         
         elif operation == "update":
             slug = operation_data.get("slug")
             if not slug:
                 return "❌ Error: Missing slug for link update"
             
-            updates = {k: v for k, v in operation_data.items() if k not in ['operation', 'slug'] and v is not None}
+            # Empty tags/UTMs mean "not mentioned", not "clear them"
+            updates = {
+                k: v for k, v in operation_data.items()
+                if k not in ['operation', 'slug'] and v is not None and v != [] and v != {}
+            }
             
             link_data = link_manager.update_link(slug, updates)
             
-            # Commit and push
-            setup_git()
-            run_command(f'git add data/links/active/{slug}.json')
-            run_command(f'git commit -m "Update link: /{slug} (issue #{issue_number})"')
-            run_command('git push origin main')
+            changed_paths.append(f'data/links/active/{slug}.json')
+            commit_message = f"Update link: /{slug} (issue #{issue_number})"
             
-            return f"✅ **Link updated successfully!**\n\n{link_manager.get_full_url(slug)}"
+            message = f"✅ **Link updated successfully!**\n\n{link_manager.get_full_url(slug)}"
         
         elif operation == "delete":
             tags = operation_data.get("tags")
@@ -368,24 +465,21 @@ def handle_link_operation(operation_data: dict, issue_number: str) -> str:
                 # Bulk delete by tag
                 count = link_manager.bulk_delete_by_tag(tags[0])
                 
-                setup_git()
-                run_command('git add data/links/')
-                run_command(f'git commit -m "Delete {count} links with tag: {tags[0]} (issue #{issue_number})"')
-                run_command('git push origin main')
+                if count:
+                    changed_paths.append('data/links/')
+                    commit_message = f"Delete {count} links with tag: {tags[0]} (issue #{issue_number})"
                 
-                return f"✅ **Deleted {count} links with tag:** {tags[0]}"
+                message = f"✅ **Deleted {count} links with tag:** {tags[0]}"
             
             elif slug:
                 # Delete single link
-                if link_manager.delete_link(slug):
-                    setup_git()
-                    run_command('git add data/links/')
-                    run_command(f'git commit -m "Delete link: /{slug} (issue #{issue_number})"')
-                    run_command('git push origin main')
-                    
-                    return f"✅ **Link deleted:** /{slug}"
-                else:
+                if not link_manager.delete_link(slug):
                     return f"❌ Link not found: /{slug}"
+                
+                changed_paths.append('data/links/')
+                commit_message = f"Delete link: /{slug} (issue #{issue_number})"
+                
+                message = f"✅ **Link deleted:** /{slug}"
             else:
                 return "❌ Error: Specify either a slug or tags for deletion"
         
@@ -396,18 +490,24 @@ def handle_link_operation(operation_data: dict, issue_number: str) -> str:
             if not links:
                 return "📭 No links found"
             
+            base_url = link_manager.resolve_base_url()
+            
             message = f"📋 **Found {len(links)} link(s):**\n\n"
             for link in links[:10]:  # Limit to 10 for comment
-                full_url = link_manager.get_full_url(link['slug'])
+                full_url = link_manager.format_link_url(link, base_url)
                 message += f"- `{full_url}` → {link['destination']}\n"
             
             if len(links) > 10:
                 message += f"\n...and {len(links) - 10} more"
-            
-            return message
         
         else:
             return f"❌ Unknown operation: {operation}"
+        
+        # Commit and push
+        if changed_paths:
+            git_commit_and_push(changed_paths, commit_message)
+        
+        return message
     
     except Exception as e:
         return f"❌ **Error:** {str(e)}"
@@ -424,6 +524,10 @@ def handle_feature_request(issue_number: str, issue_title: str, issue_body: str)
         # Import SDK here to avoid dependency issues if not installed
         from openhands.sdk import LLM, Conversation, get_logger
         from openhands.tools.preset.default import get_default_agent
+        from openlinks_prompts import (
+            FEATURE_IMPLEMENTATION_STATIC,
+            feature_implementation_prompt
+        )
         
         logger = get_logger(__name__)
         
@@ -442,8 +546,8 @@ def handle_feature_request(issue_number: str, issue_title: str, issue_body: str)
         
         llm = LLM(**llm_config)
         
-        # Create prompt
-        prompt = FEATURE_IMPLEMENTATION_PROMPT.format(
+        # Create prompt (single message: static prefix first, issue details last)
+        prompt = FEATURE_IMPLEMENTATION_STATIC + feature_implementation_prompt(
             issue_title=issue_title,
             issue_body=issue_body,
             issue_number=issue_number
@@ -468,10 +572,13 @@ def handle_feature_request(issue_number: str, issue_title: str, issue_body: str)
         logger.info("Feature implementation completed")
         
         # Check if PR was created
-        result = run_command("gh pr list --head feature/issue-{issue_number} --json number,url", check=False)
+        result = run_command(
+            ['gh', 'pr', 'list', '--head', f'feature/issue-{issue_number}', '--json', 'number,url'],
+            check=False
+        )
         
         if result.returncode == 0 and result.stdout:
-            pr_data = json.loads(result.stdout)
+            pr_data = _loads(result.stdout)
             if pr_data:
                 pr_url = pr_data[0]['url']
                 return f"✅ **Feature implemented!**\n\nPull Request: {pr_url}"
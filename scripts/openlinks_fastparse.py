@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Fast Parse - Rule-based parsing for common link operation requests
+
+Handles the dominant request shapes ("Shorten X to /Y", "Delete all links
+tagged Z", "List all links with tag W", ...) with precompiled regexes so
+the agent can skip the LLM round-trip. Anything that doesn't match a rule
+exactly is left to the LLM.
+"""
+
+import re
+from typing import Dict, Optional
+
+
+# Each rule must match a whole request line; partial matches fall through
+_FLAGS = re.IGNORECASE
+# A destination needs a scheme or a dotted host, so "this"/"link" aren't URLs
+_DESTINATION = r'(?P<destination>[a-z][\w+.-]*://\S+|[\w-]+(?:\.[\w-]+)+\S*)'
+SHORTEN_RE = re.compile(
+    r'^(?:shorten|create|make)\s+' + _DESTINATION + r'\s+(?:to|→|->)\s+/(?P<slug>[\w-]+)'
+    r'(?:\s+with\s+(?P<utm_source>[\w-]+)\s+utms?)?$',
+    _FLAGS
+)
+CREATE_SLUG_FIRST_RE = re.compile(
+    r'^(?:create|make)\s+/(?P<slug>[\w-]+)\s+(?:→|->|to)\s+' + _DESTINATION +
+    r'(?:\s+with\s+(?P<utm_source>[\w-]+)\s+utms?)?$',
+    _FLAGS
+)
+DELETE_TAG_RE = re.compile(r'^delete\s+all\s+links\s+tagged\s+(?:with\s+)?(?P<tag>[\w-]+)$', _FLAGS)
+DELETE_SLUG_RE = re.compile(r'^delete\s+(?:link\s+)?/(?P<slug>[\w-]+)$', _FLAGS)
+LIST_ALL_RE = re.compile(r'^(?:list|show(?:\s+me)?)\s+all\s+links$', _FLAGS)
+LIST_TAG_RE = re.compile(
+    r'^(?:list|show(?:\s+me)?)\s+all\s+links\s+(?:with\s+tag|tagged)\s+(?P<tag>[\w-]+)$',
+    _FLAGS
+)
+
+# Lines GitHub issue forms add around the actual request
+_SKIP_LINE_RE = re.compile(r'^(?:#.*|_no response_)$', _FLAGS)
+_SCHEME_RE = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*://')
+# List/bullet markers and quotes are stripped from the start of a line,
+# sentence punctuation and quotes from the end. "-" and "_" are slug/tag
+# characters, so they are never stripped from the end.
+_LEADING_CHARS = ' \t"\'`-*'
+_TRAILING_CHARS = ' \t"\'`.!'
+
+
+def _operation(operation: str, **fields) -> Dict:
+    """Build an operation dictionary in the same shape the LLM returns"""
+    result = {
+        "operation": operation,
+        "slug": None,
+        "destination": None,
+        "utm_params": {},
+        "expires_at": None,
+        "redirect_after_expiry": None,
+        "tags": [],
+        "description": None
+    }
+    result.update(fields)
+    return result
+
+
+def _parse_create(match: re.Match) -> Dict:
+    """Build a create operation from a SHORTEN_RE/CREATE_SLUG_FIRST_RE match"""
+    destination = match.group('destination')
+    if not _SCHEME_RE.match(destination):
+        destination = f"https://{destination}"
+    
+    utm_params = {}
+    if match.group('utm_source'):
+        utm_params["utm_source"] = match.group('utm_source').lower()
+    
+    return _operation(
+        "create",
+        slug=match.group('slug'),
+        destination=destination,
+        utm_params=utm_params
+    )
+
+
+def _parse_line(line: str) -> Optional[Dict]:
+    """Parse a single request line, or None if no rule matches it exactly"""
+    for pattern in (SHORTEN_RE, CREATE_SLUG_FIRST_RE):
+        match = pattern.match(line)
+        if match:
+            return _parse_create(match)
+    
+    match = DELETE_TAG_RE.match(line)
+    if match:
+        return _operation("delete", tags=[match.group('tag')])
+    
+    match = DELETE_SLUG_RE.match(line)
+    if match:
+        return _operation("delete", slug=match.group('slug'))
+    
+    if LIST_ALL_RE.match(line):
+        return _operation("list")
+    
+    match = LIST_TAG_RE.match(line)
+    if match:
+        return _operation("list", tags=[match.group('tag')])
+    
+    return None
+
+
+def fastparse(request_text: str) -> Optional[Dict]:
+    """
+    Parse a link operation request without the LLM
+    
+    Every non-empty line (ignoring issue-form headings and "_No response_"
+    placeholders) must match a rule and all lines must agree, e.g. an issue
+    whose title and body repeat the same request.
+    
+    Returns:
+        Operation dictionary, or None if the request needs the LLM
+    """
+    result = None
+    
+    for raw_line in request_text.splitlines():
+        line = raw_line.strip().lstrip(_LEADING_CHARS).rstrip(_TRAILING_CHARS)
+        if not line or _SKIP_LINE_RE.match(raw_line.strip()):
+            continue
+        
+        parsed = _parse_line(line)
+        if parsed is None or (result is not None and parsed != result):
+            return None
+        result = parsed
+    
+    return result
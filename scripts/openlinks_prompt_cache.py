@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Prompt Cache - Structural response cache for link operation parsing
+
+Many link requests share a shape and differ only in their entities
+("Shorten X to /Y", "Delete all links tagged Z"). This module reduces a
+request to a template by replacing URLs, slugs and tags with numbered
+placeholders, and remembers the parsed JSON the LLM returned for that
+template with the same entities swapped for placeholders. A later request
+with the same template is answered locally by filling the placeholders
+back in, skipping the LLM call. Results are only cached when the slug,
+destination and tags were copied verbatim from the request, so nothing
+the model inferred or normalized is replayed for a different request.
+
+Entries live in a small SQLite database (see PROMPT_CACHE_FILE).
+"""
+
+import json
+import os
+import re
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+# Constants
+PROJECT_ROOT = Path(__file__).parent.parent
+PROMPT_CACHE_FILE = Path(
+    os.getenv("OPENLINKS_PROMPT_CACHE", PROJECT_ROOT / ".cache" / "openlinks_prompt_cache.sqlite3")
+)
+
+# Slot extractors, applied in order; each match is replaced in the request
+# text before the next extractor runs so e.g. URL paths aren't read as slugs
+_SLOT_PATTERNS = (
+    ("url", re.compile(r'https?://\S+|\b[\w-]+(?:\.[\w-]+)+(?:/\S*)?')),
+    ("slug", re.compile(r'(?<![\w.:/])/([\w-]+)')),
+    ("tag", re.compile(r'\btag(?:ged|s)?\s+([\w-]+)', re.IGNORECASE)),
+)
+_PLACEHOLDER_RE = re.compile(r'<<[a-z]+\d+>>')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Entity fields must be taken verbatim from the request: a bare placeholder,
+# optionally behind a URL scheme the model added ("https://<<url0>>")
+_ENTITY_FIELDS = ("slug", "destination")
+_ENTITY_VALUE_RE = re.compile(r'(?:[a-z][\w+.-]*://)?<<[a-z]+\d+>>')
+
+# Free text the model writes itself; never replayed for another request
+_FREE_TEXT_FIELDS = ("description",)
+
+
+def extract_template(request_text: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Reduce a request to its structural template
+    
+    Returns:
+        (template, slots) where template is the normalized, lowercased
+        request with entities replaced by placeholders like <<url0>>, and
+        slots maps each placeholder to the entity it replaced
+    """
+    text = request_text.strip()
+    slots = {}
+    
+    for kind, pattern in _SLOT_PATTERNS:
+        counter = 0
+        
+        def replace(match):
+            nonlocal counter
+            placeholder = f"<<{kind}{counter}>>"
+            counter += 1
+            
+            # Swap only the captured entity, keeping e.g. the "/" or "tagged "
+            group = match.lastindex or 0
+            slots[placeholder] = match.group(group)
+            start = match.start(group) - match.start()
+            end = match.end(group) - match.start()
+            return match.group(0)[:start] + placeholder + match.group(0)[end:]
+        
+        text = pattern.sub(replace, text)
+    
+    template = _WHITESPACE_RE.sub(' ', text).lower()
+    return template, slots
+
+
+def _map_strings(value, func):
+    """Apply func to every string inside a JSON-like value"""
+    if isinstance(value, str):
+        return func(value)
+    if isinstance(value, list):
+        return [_map_strings(item, func) for item in value]
+    if isinstance(value, dict):
+        return {key: _map_strings(item, func) for key, item in value.items()}
+    return value
+
+
+def _strings(value):
+    """Yield every string inside a JSON-like value"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+
+
+def _is_replayable(skeleton: Dict) -> bool:
+    """Check that a skeleton's entity fields are all placeholders"""
+    for field in _ENTITY_FIELDS:
+        value = skeleton.get(field)
+        if value is not None and not (
+            isinstance(value, str) and _ENTITY_VALUE_RE.fullmatch(value)
+        ):
+            return False
+    
+    tags = skeleton.get("tags")
+    if tags is not None and not (
+        isinstance(tags, list)
+        and all(isinstance(tag, str) and _ENTITY_VALUE_RE.fullmatch(tag) for tag in tags)
+    ):
+        return False
+    
+    return True
+
+
+def _to_skeleton(parsed: Dict, slots: Dict[str, str]) -> Optional[Dict]:
+    """
+    Replace slot values in parsed output with their placeholders
+    
+    Returns:
+        The skeleton, or None if the parsed output can't safely be replayed
+        for another request with the same template: an entity field isn't
+        taken verbatim from the request (e.g. the model normalized a URL),
+        a slot went unused, or a slot value survived outside a placeholder
+    """
+    # Two placeholders with the same value can't be told apart on fill
+    if len({value.lower() for value in slots.values()}) != len(slots):
+        return None
+    
+    # Longest values first so e.g. a slug can't clobber part of a URL
+    ordered = sorted(slots.items(), key=lambda item: len(item[1]), reverse=True)
+    patterns = [
+        (placeholder, re.compile(
+            r'(?<![\w-])' + re.escape(value) + r'(?![\w-])', re.IGNORECASE
+        ))
+        for placeholder, value in ordered
+    ]
+    
+    def generalize(text: str) -> str:
+        for placeholder, pattern in patterns:
+            text = pattern.sub(placeholder, text)
+        return text
+    
+    # operation comes from a fixed vocabulary and is kept as-is
+    skeleton = {
+        key: None if key in _FREE_TEXT_FIELDS
+        else value if key == "operation"
+        else _map_strings(value, generalize)
+        for key, value in parsed.items()
+    }
+    
+    if not _is_replayable(skeleton):
+        return None
+    
+    text = "\n".join(
+        "\n".join(_strings(value)) for key, value in skeleton.items() if key != "operation"
+    )
+    if any(placeholder not in text for placeholder in slots):
+        return None
+    
+    leftover = _PLACEHOLDER_RE.sub("\n", text).lower()
+    if any(value.lower() in leftover for value in slots.values()):
+        return None
+    
+    return skeleton
+
+
+def _fill_skeleton(skeleton: Dict, slots: Dict[str, str]) -> Optional[Dict]:
+    """Fill placeholders in a skeleton; None if any are left unbound"""
+    unbound = False
+    
+    def fill(text: str) -> str:
+        nonlocal unbound
+        
+        def replace(match):
+            nonlocal unbound
+            if match.group(0) not in slots:
+                unbound = True
+                return match.group(0)
+            return slots[match.group(0)]
+        
+        return _PLACEHOLDER_RE.sub(replace, text)
+    
+    filled = _map_strings(skeleton, fill)
+    return None if unbound else filled
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the cache database, creating it if needed"""
+    PROMPT_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(PROMPT_CACHE_FILE)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS link_operations ("
+        "template TEXT PRIMARY KEY, skeleton TEXT NOT NULL)"
+    )
+    return conn
+
+
+def lookup(request_text: str) -> Optional[Dict]:
+    """
+    Answer a link operation request from the cache
+    
+    Returns:
+        Parsed operation dictionary, or None on a miss (including when the
+        cached skeleton references placeholders this request doesn't bind)
+    """
+    template, slots = extract_template(request_text)
+    
+    try:
+        with closing(_connect()) as conn:
+            row = conn.execute(
+                "SELECT skeleton FROM link_operations WHERE template = ?", (template,)
+            ).fetchone()
+        skeleton = json.loads(row[0]) if row else None
+    except (sqlite3.Error, OSError, ValueError):
+        return None
+    
+    # Entries written before the replay checks existed may not pass them
+    if not isinstance(skeleton, dict) or not _is_replayable(skeleton):
+        return None
+    
+    return _fill_skeleton(skeleton, slots)
+
+
+def store(request_text: str, parsed: Dict) -> bool:
+    """
+    Remember the parsed result for a request's template
+    
+    Returns:
+        True if the entry was stored
+    """
+    template, slots = extract_template(request_text)
+    skeleton = _to_skeleton(parsed, slots)
+    if skeleton is None:
+        return False
+    
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO link_operations (template, skeleton) VALUES (?, ?)",
+                (template, json.dumps(skeleton))
+            )
+    except (sqlite3.Error, OSError, ValueError):
+        return False
+    
+    return True
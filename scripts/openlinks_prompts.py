@@ -1,17 +1,66 @@
 #!/usr/bin/env python3
 """
 Prompt templates for OpenLinks Agent
+
+Each prompt is split into a STATIC prefix (instructions, examples, return
+format) that is identical on every call, and a *_prompt() function that
+renders the per-issue suffix with an f-string. Keeping the static part
+first lets LLM providers cache it; see as_cached_messages().
+
+The STATIC prefixes are never passed through str.format, so literal JSON
+braces in them are written as-is (no {{ }} escaping); only the f-string
+renderers interpolate values.
+
+The *_STATIC prefixes are built on first attribute access (PEP 562
+module __getattr__), so a run only pays for the prompts it uses. Keep
+them ASCII (e.g. "->", not an arrow character): CPython stores an ASCII
+str at one byte per character, while a single non-Latin-1 character
+doubles the size of the whole string.
 """
 
-FEATURE_IMPLEMENTATION_PROMPT = """
-You are implementing a feature request for OpenLinks, a link shortening system.
+import functools
+import sys
+from typing import Dict, List, Optional
 
-**Issue Title:** {issue_title}
 
-**Issue Description:**
-{issue_body}
+# Shared examples, spliced into the prompts below once at import time.
+# Feature requests, most representative first.
+FEATURE_EXAMPLES = (
+    "Add QR code generation",
+    "Create a web dashboard",
+    "Implement analytics tracking",
+    "Add bulk delete by tag",
+    "Add custom redirect pages",
+)
+
+# Link operation requests with their expected extraction, most
+# representative first.
+LINK_OP_EXAMPLES = (
+    ("Shorten luma.com to /luma with newsletter UTMs", """\
+-> Operation: create
+-> Slug: luma
+-> Destination: https://luma.com
+-> UTM: {"utm_source": "newsletter"}"""),
+    ("Delete all links tagged january", """\
+-> Operation: delete
+-> Tags: ["january"]"""),
+    ("Create google.com -> /ggl with newsletter UTMs, expires next week, redirect to homepage", """\
+-> Operation: create
+-> Slug: ggl
+-> Destination: https://google.com
+-> UTM: {"utm_source": "newsletter"}
+-> Expiration: next week
+-> Redirect After Expiry: https://openhands.dev"""),
+    ("List all links with tag newsletter", """\
+-> Operation: list
+-> Tags: ["newsletter"]"""),
+)
 
-**Issue Number:** #{issue_number}
+
+def _build_feature_implementation_static() -> str:
+    """Build FEATURE_IMPLEMENTATION_STATIC"""
+    return """
+You are implementing a feature request for OpenLinks, a link shortening system.
 
 **Current Repository Structure:**
 - `scripts/` - Python utilities (link_manager.py, openlinks_agent.py)
@@ -24,7 +73,7 @@ You are implementing a feature request for OpenLinks, a link shortening system.
 **Your Task:**
 1. Analyze the feature request
 2. Implement the feature by modifying/creating the necessary files
-3. Create a new branch: `feature/issue-{issue_number}`
+3. Create a new branch with the exact name given under **Branch:** below
 4. Commit your changes with clear commit messages
 5. Push the branch and create a pull request
 
@@ -35,21 +84,30 @@ You are implementing a feature request for OpenLinks, a link shortening system.
 - Test your changes locally before creating the PR
 
 **Example Features:**
-- QR code generation for links
-- Analytics integration
-- Bulk operations by tag
-- Link expiration handling
-- Custom redirect pages
+""" + "".join(f"- {example}\n" for example in FEATURE_EXAMPLES)
+
+
+def feature_implementation_prompt(issue_title: str, issue_body: str, issue_number: str) -> str:
+    """Per-issue suffix for FEATURE_IMPLEMENTATION_STATIC"""
+    return f"""
+**Issue Title:** {issue_title}
+
+**Issue Description:**
+{issue_body}
+
+**Issue Number:** #{issue_number}
+
+**Branch:** `feature/issue-{issue_number}`
 
 Begin implementation now.
 """
 
 
-LINK_OPERATION_PROMPT = """
+def _build_link_operation_static() -> str:
+    """Build LINK_OPERATION_STATIC"""
+    return """
 You are parsing a natural language link operation request for OpenLinks.
 
-**Request:** {request_text}
-
 **Your Task:**
 Extract the following information from the request:
 
@@ -64,82 +122,149 @@ Extract the following information from the request:
 
 **Examples:**
 
-Request: "Shorten luma.com to /luma with newsletter UTMs"
-→ Operation: create
-→ Slug: luma
-→ Destination: https://luma.com
-→ UTM: {{"utm_source": "newsletter"}}
-
-Request: "Create google.com → /ggl with newsletter UTMs, expires next week, redirect to homepage"
-→ Operation: create
-→ Slug: ggl
-→ Destination: https://google.com
-→ UTM: {{"utm_source": "newsletter"}}
-→ Expiration: next week
-→ Redirect After Expiry: https://openhands.dev
-
-Request: "Delete all links tagged january"
-→ Operation: delete
-→ Tags: ["january"]
-
-Request: "List all links with tag newsletter"
-→ Operation: list
-→ Tags: ["newsletter"]
-
-**Return Format:**
-Return ONLY a valid JSON object with the extracted information:
-```json
-{{
-  "operation": "create|update|delete|list",
-  "slug": "slug-name",
-  "destination": "https://example.com",
-  "utm_params": {{
-    "utm_source": "source",
-    "utm_medium": "medium",
-    "utm_campaign": "campaign"
-  }},
-  "expires_at": "natural language or ISO date",
-  "redirect_after_expiry": "https://fallback.com",
-  "tags": ["tag1", "tag2"],
-  "description": "Description text"
-}}
-```
-
-Parse the request now and return ONLY the JSON object.
+""" + "".join(f'Request: "{request}"\n{result}\n\n' for request, result in LINK_OP_EXAMPLES) + """\
+Use null for anything the request does not mention.
 """
 
 
-CLASSIFICATION_PROMPT = """
-You are classifying a GitHub issue for OpenLinks, a link shortening system.
+# Fixed response vocabularies, interned so comparisons against parsed model
+# output can short-circuit on identity
+OPERATIONS = tuple(sys.intern(op) for op in ("create", "update", "delete", "list"))
+CLASSIFICATIONS = (sys.intern("FEATURE"), sys.intern("LINK"))
 
-**Issue Title:** {issue_title}
+_UTM_KEYS = ("utm_source", "utm_medium", "utm_campaign", "utm_content", "utm_term")
 
-**Issue Body:**
-{issue_body}
 
-**Your Task:**
-Determine if this is a FEATURE request or a LINK operation.
-
-**FEATURE Requests:**
-These are requests to modify the codebase, add new capabilities, or change how the system works.
-Examples:
-- "Add QR code generation"
-- "Implement analytics tracking"
-- "Add bulk delete by tag"
-- "Create a web dashboard"
-- "Add expiration date support"
-
-**LINK Operations:**
-These are requests to create, update, delete, or manage specific links.
-Examples:
-- "Shorten luma.com to /luma"
-- "Create google.com → /ggl with UTMs"
-- "Delete all links tagged january"
-- "Update /docs to point to new URL"
-- "List all newsletter links"
-
-**Response:**
-Respond with ONLY one word: FEATURE or LINK
-
-Classification:
+def _nullable_string() -> Dict:
+    """Schema for an optional string field under strict mode"""
+    return {"type": ["string", "null"]}
+
+
+# JSON schema for the LINK_OPERATION response, enforced by the provider via
+# response_format. Strict mode requires every property to be listed in
+# "required"; optional values are expressed as nullable instead.
+LINK_OPERATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "operation": {"type": "string", "enum": list(OPERATIONS)},
+        "slug": _nullable_string(),
+        "destination": _nullable_string(),
+        "utm_params": {
+            "type": "object",
+            "properties": {key: _nullable_string() for key in _UTM_KEYS},
+            "required": list(_UTM_KEYS),
+            "additionalProperties": False
+        },
+        "expires_at": _nullable_string(),
+        "redirect_after_expiry": _nullable_string(),
+        "tags": {"type": ["array", "null"], "items": {"type": "string"}},
+        "description": _nullable_string()
+    },
+    "required": [
+        "operation", "slug", "destination", "utm_params",
+        "expires_at", "redirect_after_expiry", "tags", "description"
+    ],
+    "additionalProperties": False
+}
+
+LINK_OPERATION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "link_operation",
+        "schema": LINK_OPERATION_SCHEMA,
+        "strict": True
+    }
+}
+
+
+def link_operation_prompt(request_text: str) -> str:
+    """Per-request suffix for LINK_OPERATION_STATIC"""
+    return f"""
+**Request:** {request_text}
+"""
+
+
+def _build_classification_static() -> str:
+    """Build CLASSIFICATION_STATIC"""
+    return """
+Classify a GitHub issue for OpenLinks (a link shortener) as FEATURE (change the code or add a capability) or LINK (create, update, delete, or list specific links).
+Examples: """ + "; ".join(
+    [f'"{example}" -> FEATURE' for example in FEATURE_EXAMPLES[:2]]
+    + [f'"{request}" -> LINK' for request, _ in LINK_OP_EXAMPLES[:2]]
+) + """.
+Answer with one word: FEATURE or LINK.
 """
+
+
+def classification_prompt(issue_title: str, issue_body: str) -> str:
+    """Per-issue suffix for CLASSIFICATION_STATIC"""
+    return f"""
+Title: {issue_title}
+Body: {issue_body}
+"""
+
+
+def as_cached_messages(static: str, dynamic: str) -> List[Dict]:
+    """
+    Build chat messages with the static prefix marked as cacheable
+    
+    Args:
+        static: One of the *_STATIC prompt prefixes
+        dynamic: The matching rendered suffix (see *_prompt())
+    
+    Returns:
+        A system message holding the static prefix (with an ephemeral
+        cache_control breakpoint) followed by the user message
+    """
+    return [
+        {
+            "role": "system",
+            "content": [
+                {
+                    "type": "text",
+                    "text": static,
+                    "cache_control": {"type": "ephemeral"}
+                }
+            ]
+        },
+        {"role": "user", "content": dynamic}
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def classification_logit_bias(model: str) -> Optional[Dict[int, int]]:
+    """
+    Logit bias restricting the classifier's first token to FEATURE or LINK
+    
+    Token IDs are tokenizer-specific, so this only applies to models tiktoken
+    knows (OpenAI models). The first token of each label is enough: the
+    answer is decided by its first letter.
+    
+    Returns:
+        {token_id: 100} for the first token of each label, or None if
+        tiktoken is not installed or doesn't know the model
+    """
+    try:
+        import tiktoken
+        encoding = tiktoken.encoding_for_model(model.split("/")[-1])
+    except (ImportError, KeyError):
+        return None
+    
+    return {encoding.encode(label)[0]: 100 for label in CLASSIFICATIONS}
+
+
+# Lazily built *_STATIC prefixes (PEP 562)
+_STATIC_BUILDERS = {
+    "FEATURE_IMPLEMENTATION_STATIC": _build_feature_implementation_static,
+    "LINK_OPERATION_STATIC": _build_link_operation_static,
+    "CLASSIFICATION_STATIC": _build_classification_static,
+}
+_static_cache: Dict[str, str] = {}
+
+
+def __getattr__(name: str) -> str:
+    if name in _STATIC_BUILDERS:
+        if name not in _static_cache:
+            _static_cache[name] = _STATIC_BUILDERS[name]()
+        return _static_cache[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")